@@ -5,10 +5,15 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response, UploadFile
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
+import csv
+import io
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 app = FastAPI(title="Mergington High School API",
@@ -80,6 +85,278 @@ activities = {
     }
 }
 
+# Guards activities against concurrent signups, unregisters and imports
+activities_lock = threading.Lock()
+
+
+# Rows validated and applied together during a bulk import
+IMPORT_BATCH_SIZE = 500
+
+# Per-row errors kept in an import summary; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Longest Idempotency-Key header accepted, to bound cache memory
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+class IdempotencyCache:
+    """Bounded LRU cache of responses keyed by client Idempotency-Key
+
+    Entries expire after `ttl_seconds`; once `max_entries` is reached the least
+    recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 24 * 60 * 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        # Keys whose handler is running, mapped to an Event set when it finishes
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.mismatches = 0
+        self.evictions = self.expirations = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.mismatches = 0
+            self.evictions = self.expirations = 0
+
+    def run(self, key, fingerprint, handler, response: Response):
+        """Return handler()'s result, replaying the stored outcome for a seen key
+
+        HTTPExceptions are stored and replayed like successful responses. A key
+        reused with a different `fingerprint` is rejected with a 422. The cache
+        lock is only held for lookups and stores; a second request for a key
+        whose handler is still running waits for that result.
+        """
+        while True:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is None:
+                    in_flight = self._in_flight.get(key)
+                    if in_flight is None:
+                        in_flight = self._in_flight[key] = threading.Event()
+                        self.misses += 1
+                        break
+                elif entry[0] != fingerprint:
+                    self.mismatches += 1
+                else:
+                    self.hits += 1
+            if entry is not None:
+                return self._replay(entry, fingerprint, response)
+            # Another request with this key is running; wait for its outcome
+            in_flight.wait()
+
+        outcome = None
+        try:
+            body = handler()
+            outcome = (fingerprint, 200, body)
+            return body
+        except HTTPException as exc:
+            outcome = (fingerprint, exc.status_code, exc.detail)
+            raise
+        finally:
+            with self._lock:
+                if outcome is not None:
+                    self._store(key, outcome)
+                self._in_flight.pop(key, None)
+            in_flight.set()
+
+    def metrics(self):
+        with self._lock:
+            # Expired entries are otherwise only dropped when looked up or
+            # when they reach the LRU front, so sweep them all here
+            now = time.monotonic()
+            for key in [key for key, (stored_at, _) in self._entries.items()
+                        if now - stored_at >= self.ttl_seconds]:
+                del self._entries[key]
+                self.expirations += 1
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "mismatches": self.mismatches,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _replay(self, entry, fingerprint, response: Response):
+        stored_fingerprint, status_code, body = entry
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request")
+        if status_code != 200:
+            raise HTTPException(status_code=status_code, detail=body,
+                                headers={"Idempotent-Replayed": "true"})
+        response.headers["Idempotent-Replayed"] = "true"
+        return body
+
+    def _lookup(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        stored_at, entry = item
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, entry):
+        now = time.monotonic()
+        # Drop expired entries from the LRU front before adding
+        while self._entries:
+            stored_at, _ = next(iter(self._entries.values()))
+            if now - stored_at < self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+            self.expirations += 1
+
+        self._entries[key] = (now, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+idempotency_cache = IdempotencyCache()
+
+
+def run_idempotent(idempotency_key, endpoint, fingerprint, handler, response):
+    """Run handler directly, or through the idempotency cache if a key was sent"""
+    if idempotency_key is None:
+        return handler()
+    if not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    return idempotency_cache.run((endpoint, idempotency_key), fingerprint,
+                                 handler, response)
+
+
+def check_signup(activity_name: str, email: str, participants=None):
+    """Raise HTTPException if a student cannot sign up for an activity
+
+    `participants` defaults to the activity's participant list; bulk imports
+    pass a set mirroring it so duplicate checks stay cheap.
+    """
+    # Validate activity exists
+    if activity_name not in activities:
+        raise HTTPException(status_code=404, detail="Activity not found")
+
+    activity = activities[activity_name]
+    if participants is None:
+        participants = activity["participants"]
+
+    # Validate student is not already signed up
+    if email in participants:
+        raise HTTPException(status_code=400, detail="Student is already signed up")
+
+    # Validate activity has room left
+    if len(participants) >= activity["max_participants"]:
+        raise HTTPException(status_code=400, detail="Activity is full")
+
+
+def _is_undecodable(value: str) -> bool:
+    """Whether value holds bytes that were not valid UTF-8 (surrogateescape)"""
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+def import_enrollment_rows(reader, batch_size: int = IMPORT_BATCH_SIZE):
+    """Sign up students from an iterator of CSV dict rows, batch by batch
+
+    Rows are read one at a time into batches. Each batch is validated with the
+    same rules as a single signup and applied while holding `activities_lock`,
+    so only one batch of rows is held in memory at a time. A row the CSV parser
+    rejects is reported and skipped; a decoding error ends the import.
+    """
+    start = time.perf_counter()
+    processed = imported = failed = 0
+    errors = []
+
+    def record_error(row_number, activity_name, email, detail):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "activity": activity_name,
+                           "email": email, "error": detail})
+
+    finished = False
+    while not finished:
+        # (line number, row or None, read error or None) for each record
+        batch = []
+        while len(batch) < batch_size:
+            # line_num is not advanced when a row fails to parse, so note where
+            # the next record starts before reading it
+            row_start = reader.line_num + 1
+            try:
+                row = next(reader, None)
+            except csv.Error as exc:
+                batch.append((row_start, None, f"Unreadable CSV row: {exc}"))
+                continue
+            except UnicodeDecodeError as exc:
+                batch.append((row_start, None, f"Unreadable CSV: {exc}; "
+                              "remaining rows were not processed"))
+                finished = True
+                break
+            if row is None:
+                finished = True
+                break
+            batch.append((reader.line_num, row, None))
+
+        with activities_lock:
+            # Validate the batch against live data plus earlier rows in it
+            participants = {}
+            accepted = {}
+            for row_number, row, read_error in batch:
+                processed += 1
+                if read_error is not None:
+                    record_error(row_number, None, None, read_error)
+                    continue
+                activity_name = (row.get("activity") or "").strip()
+                email = (row.get("email") or "").strip()
+                if _is_undecodable(activity_name) or _is_undecodable(email):
+                    record_error(row_number, None, None, "Row is not valid UTF-8")
+                    continue
+                if not activity_name or not email:
+                    record_error(row_number, activity_name, email,
+                                 "Missing activity or email")
+                    continue
+                if activity_name in activities and activity_name not in participants:
+                    participants[activity_name] = set(
+                        activities[activity_name]["participants"])
+                try:
+                    check_signup(activity_name, email, participants.get(activity_name))
+                except HTTPException as exc:
+                    record_error(row_number, activity_name, email, exc.detail)
+                    continue
+                participants[activity_name].add(email)
+                accepted.setdefault(activity_name, []).append(email)
+
+            # Apply the validated batch
+            for activity_name, emails in accepted.items():
+                activities[activity_name]["participants"].extend(emails)
+                imported += len(emails)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "processed": processed,
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
 
 @app.get("/")
 def root():
@@ -91,39 +368,66 @@ def get_activities():
     return activities
 
 
+@app.get("/idempotency/metrics")
+def get_idempotency_metrics():
+    return idempotency_cache.metrics()
+
+
 @app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
+def signup_for_activity(activity_name: str, email: str, response: Response,
+                        idempotency_key: str | None = Header(default=None)):
     """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    def signup():
+        with activities_lock:
+            check_signup(activity_name, email)
 
-    # Get the specific activity
-    activity = activities[activity_name]
+            # Add student
+            activities[activity_name]["participants"].append(email)
+        return {"message": f"Signed up {email} for {activity_name}"}
+
+    return run_idempotent(idempotency_key, "signup", (activity_name, email),
+                          signup, response)
 
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student is already signed up")
 
-    # Add student
-    activity["participants"].append(email)
-    return {"message": f"Signed up {email} for {activity_name}"}
+@app.post("/activities/import")
+def import_enrollments(file: UploadFile):
+    """Bulk sign up students from a CSV with `activity` and `email` columns"""
+    # The upload is already spooled (to disk once large); parse it row by row.
+    # Invalid UTF-8 is escaped rather than raised so it is reported per row.
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig",
+                            errors="surrogateescape", newline="")
+    reader = csv.DictReader(text)
+    try:
+        fieldnames = reader.fieldnames or []
+    except csv.Error:
+        raise HTTPException(status_code=400, detail="File is not a valid CSV")
+    if "activity" not in fieldnames or "email" not in fieldnames:
+        raise HTTPException(status_code=400,
+                            detail="CSV must have 'activity' and 'email' columns")
+
+    return import_enrollment_rows(reader)
 
 
 @app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str):
+def unregister_from_activity(activity_name: str, email: str, response: Response,
+                             idempotency_key: str | None = Header(default=None)):
     """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
-    
-    # Get the specific activity
-    activity = activities[activity_name]
-    
-    # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student is not signed up for this activity")
-    
-    # Remove student
-    activity["participants"].remove(email)
-    return {"message": f"Unregistered {email} from {activity_name}"}
+    def unregister():
+        with activities_lock:
+            # Validate activity exists
+            if activity_name not in activities:
+                raise HTTPException(status_code=404, detail="Activity not found")
+
+            # Get the specific activity
+            activity = activities[activity_name]
+
+            # Validate student is signed up
+            if email not in activity["participants"]:
+                raise HTTPException(status_code=400, detail="Student is not signed up for this activity")
+
+            # Remove student
+            activity["participants"].remove(email)
+        return {"message": f"Unregistered {email} from {activity_name}"}
+
+    return run_idempotent(idempotency_key, "unregister", (activity_name, email),
+                          unregister, response)
@@ -0,0 +1,56 @@
+"""
+Bulk enrollment import CLI
+
+Uploads a registrar CSV (with `activity` and `email` columns) to a running
+Mergington High School API and prints the import summary.
+
+    python import_enrollments.py enrollments.csv --url http://localhost:8000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import httpx
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import enrollments from a CSV file")
+    parser.add_argument("csv_file", type=Path, help="CSV with 'activity' and 'email' columns")
+    parser.add_argument("--url", default="http://localhost:8000",
+                        help="Base URL of the API (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    # The file object is streamed to the server rather than read up front
+    try:
+        with args.csv_file.open("rb") as csv_file:
+            response = httpx.post(
+                f"{args.url.rstrip('/')}/activities/import",
+                files={"file": (args.csv_file.name, csv_file, "text/csv")},
+                timeout=None,
+            )
+    except (OSError, httpx.HTTPError) as exc:
+        print(f"Import failed: {exc}", file=sys.stderr)
+        return 1
+
+    is_json = response.headers.get("content-type", "").startswith("application/json")
+    if response.status_code != 200 or not is_json:
+        detail = response.json().get("detail") if is_json else None
+        print(f"Import failed: HTTP {response.status_code} {detail or response.reason_phrase}",
+              file=sys.stderr)
+        return 1
+
+    result = response.json()
+    print(f"Processed {result['processed']} rows in {result['elapsed_seconds']}s "
+          f"({result['rows_per_second']} rows/s)")
+    print(f"Imported {result['imported']}, failed {result['failed']}")
+    for error in result["errors"]:
+        print(f"  row {error['row']}: {error['error']} "
+              f"({error['activity']}, {error['email']})")
+    if result["failed"] > len(result["errors"]):
+        print(f"  ... and {result['failed'] - len(result['errors'])} more")
+    return 0 if result["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
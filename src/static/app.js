@@ -74,7 +74,7 @@ document.addEventListener("DOMContentLoaded", () => {
     const activity = document.getElementById("activity").value;
 
     try {
-      const response = await fetch(
+      const response = await fetchWithRetry(
         `/activities/${encodeURIComponent(activity)}/signup?email=${encodeURIComponent(email)}`,
         {
           method: "POST",
@@ -113,10 +113,35 @@ document.addEventListener("DOMContentLoaded", () => {
   fetchActivities();
 });
 
+// Create an Idempotency-Key (crypto.randomUUID only exists over HTTPS or localhost)
+function newIdempotencyKey() {
+  if (window.crypto && typeof crypto.randomUUID === "function") {
+    return crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Fetch that retries network failures with one Idempotency-Key per user action,
+// so a request that already reached the server is replayed rather than redone
+async function fetchWithRetry(url, options, retries = 2) {
+  const headers = { ...options.headers, "Idempotency-Key": newIdempotencyKey() };
+
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await fetch(url, { ...options, headers });
+    } catch (error) {
+      if (attempt >= retries) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500 * (attempt + 1)));
+    }
+  }
+}
+
 // Global function to unregister a participant
 async function unregisterParticipant(activityName, email) {
   try {
-    const response = await fetch(
+    const response = await fetchWithRetry(
       `/activities/${encodeURIComponent(activityName)}/unregister?email=${encodeURIComponent(email)}`,
       {
         method: "DELETE",
@@ -9,7 +9,7 @@ import os
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from app import app, activities
+from app import app, activities, idempotency_cache
 
 
 @pytest.fixture
@@ -82,9 +82,11 @@ def reset_activities():
     # Reset activities to original state
     activities.clear()
     activities.update(original_activities)
+    idempotency_cache.clear()
     
     yield
     
     # Clean up after test (reset again)
     activities.clear()
-    activities.update(original_activities)
\ No newline at end of file
+    activities.update(original_activities)
+    idempotency_cache.clear()
\ No newline at end of file
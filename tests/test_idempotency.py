@@ -0,0 +1,176 @@
+"""
+Test cases for Idempotency-Key support on signup and unregister
+"""
+import threading
+
+from fastapi import Response
+
+from app import IdempotencyCache
+
+
+def test_signup_replay_returns_original_response(client, reset_activities):
+    """Test that retrying a signup with the same key replays the first result"""
+    email = "retry@mergington.edu"
+    activity = "Chess Club"
+    headers = {"Idempotency-Key": "signup-1"}
+
+    first = client.post(f"/activities/{activity}/signup?email={email}", headers=headers)
+    assert first.status_code == 200
+
+    retry = client.post(f"/activities/{activity}/signup?email={email}", headers=headers)
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    # Student was only added once
+    response = client.get("/activities")
+    assert response.json()[activity]["participants"].count(email) == 1
+
+
+def test_unregister_replay_returns_original_response(client, reset_activities):
+    """Test that retrying an unregister with the same key replays the first result"""
+    email = "michael@mergington.edu"
+    activity = "Chess Club"
+    headers = {"Idempotency-Key": "unregister-1"}
+
+    first = client.delete(f"/activities/{activity}/unregister?email={email}", headers=headers)
+    assert first.status_code == 200
+
+    retry = client.delete(f"/activities/{activity}/unregister?email={email}", headers=headers)
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+
+
+def test_error_responses_are_replayed(client, reset_activities):
+    """Test that a failed request replays its original error"""
+    headers = {"Idempotency-Key": "missing-1"}
+
+    first = client.post("/activities/Nowhere/signup?email=a@mergington.edu", headers=headers)
+    assert first.status_code == 404
+
+    retry = client.post("/activities/Nowhere/signup?email=a@mergington.edu", headers=headers)
+    assert retry.status_code == 404
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_reused_for_different_request(client, reset_activities):
+    """Test that reusing a key with different parameters is rejected"""
+    headers = {"Idempotency-Key": "reused-1"}
+
+    response = client.post("/activities/Chess Club/signup?email=a@mergington.edu", headers=headers)
+    assert response.status_code == 200
+
+    response = client.post("/activities/Chess Club/signup?email=b@mergington.edu", headers=headers)
+    assert response.status_code == 422
+
+    response = client.get("/activities")
+    assert "b@mergington.edu" not in response.json()["Chess Club"]["participants"]
+
+    response = client.get("/idempotency/metrics")
+    data = response.json()
+    assert data["mismatches"] == 1
+    assert data["hits"] == 0
+
+
+def test_requests_without_key_are_not_cached(client, reset_activities):
+    """Test that requests without a key behave as before"""
+    email = "michael@mergington.edu"
+
+    response = client.post(f"/activities/Chess Club/signup?email={email}")
+    assert response.status_code == 400
+
+    response = client.get("/idempotency/metrics")
+    data = response.json()
+    assert data["size"] == 0
+    assert data["hits"] == 0
+    assert data["misses"] == 0
+
+
+def test_metrics_count_hits_and_misses(client, reset_activities):
+    """Test that the metrics endpoint reports cache hits and misses"""
+    headers = {"Idempotency-Key": "metrics-1"}
+    for _ in range(3):
+        client.post("/activities/Art Club/signup?email=m@mergington.edu", headers=headers)
+
+    response = client.get("/idempotency/metrics")
+    data = response.json()
+    assert data["misses"] == 1
+    assert data["hits"] == 2
+    assert data["size"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the cache stays within max_entries"""
+    cache = IdempotencyCache(max_entries=2)
+    for key in ["a", "b", "a", "c"]:
+        cache.run(key, None, lambda: {"key": key}, Response())
+
+    metrics = cache.metrics()
+    assert metrics["size"] == 2
+    assert metrics["evictions"] == 1
+    # "b" was least recently used, so it is handled again
+    assert cache.run("b", None, lambda: {"key": "new"}, Response()) == {"key": "new"}
+
+
+def test_cache_entries_expire():
+    """Test that entries older than the TTL are not replayed"""
+    cache = IdempotencyCache(ttl_seconds=0)
+    cache.run("a", None, lambda: {"n": 1}, Response())
+
+    assert cache.run("a", None, lambda: {"n": 2}, Response()) == {"n": 2}
+    assert cache.metrics()["misses"] == 2
+
+
+def test_metrics_size_excludes_expired_entries():
+    """Test that expired entries are not counted in the cache size"""
+    cache = IdempotencyCache(ttl_seconds=0)
+    for key in ["a", "b", "c"]:
+        cache.run(key, None, lambda: {}, Response())
+
+    metrics = cache.metrics()
+    assert metrics["size"] == 0
+    assert metrics["expirations"] == 3
+
+
+def test_concurrent_requests_run_handler_once():
+    """Test that a request waits for an in-flight request with the same key"""
+    cache = IdempotencyCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_handler():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"n": len(calls)}
+
+    results = []
+    first = threading.Thread(
+        target=lambda: results.append(cache.run("a", None, slow_handler, Response())))
+    first.start()
+    started.wait(5)
+
+    # The cache stays usable for other keys while "a" is running
+    assert cache.run("b", None, lambda: {"n": 0}, Response()) == {"n": 0}
+    assert cache.metrics()["size"] == 1
+
+    second = threading.Thread(
+        target=lambda: results.append(cache.run("a", None, slow_handler, Response())))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert calls == [1]
+    assert results == [{"n": 1}, {"n": 1}]
+    assert cache.metrics()["hits"] == 1
+
+
+def test_invalid_key_rejected(client, reset_activities):
+    """Test that an overly long key is rejected"""
+    headers = {"Idempotency-Key": "x" * 256}
+
+    response = client.post("/activities/Chess Club/signup?email=a@mergington.edu", headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,158 @@
+"""
+Test cases for bulk enrollment import
+"""
+import csv
+
+from app import import_enrollment_rows
+
+
+def upload(client, content):
+    """Post CSV content (str or bytes) to the import endpoint"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return client.post(
+        "/activities/import",
+        files={"file": ("enrollments.csv", content, "text/csv")},
+    )
+
+
+def test_import_success(client, reset_activities):
+    """Test importing valid rows signs students up"""
+    content = (
+        "activity,email\n"
+        "Chess Club,new1@mergington.edu\n"
+        "Art Club,new2@mergington.edu\n"
+    )
+
+    response = upload(client, content)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["processed"] == 2
+    assert data["imported"] == 2
+    assert data["failed"] == 0
+    assert data["errors"] == []
+    assert "rows_per_second" in data
+
+    response = client.get("/activities")
+    activities = response.json()
+    assert "new1@mergington.edu" in activities["Chess Club"]["participants"]
+    assert "new2@mergington.edu" in activities["Art Club"]["participants"]
+
+
+def test_import_reports_row_errors(client, reset_activities):
+    """Test that invalid rows are reported and valid rows still imported"""
+    content = (
+        "activity,email\n"
+        "Chess Club,michael@mergington.edu\n"
+        "Non-existent Club,student@mergington.edu\n"
+        "Chess Club,\n"
+        "Chess Club,dup@mergington.edu\n"
+        "Chess Club,dup@mergington.edu\n"
+    )
+
+    response = upload(client, content)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["processed"] == 5
+    assert data["imported"] == 1
+    assert data["failed"] == 4
+
+    errors = {error["row"]: error["error"] for error in data["errors"]}
+    assert "already signed up" in errors[2]
+    assert "Activity not found" in errors[3]
+    assert "Missing activity or email" in errors[4]
+    assert "already signed up" in errors[6]
+
+
+def test_import_respects_capacity(client, reset_activities):
+    """Test that rows beyond an activity's capacity are rejected"""
+    # Mathletes has 10 spots and 2 participants
+    rows = [f"Mathletes,student{i}@mergington.edu" for i in range(10)]
+    content = "activity,email\n" + "\n".join(rows) + "\n"
+
+    response = upload(client, content)
+    data = response.json()
+    assert data["imported"] == 8
+    assert data["failed"] == 2
+    assert all(error["error"] == "Activity is full" for error in data["errors"])
+
+    response = client.get("/activities")
+    assert len(response.json()["Mathletes"]["participants"]) == 10
+
+
+def test_import_across_batches(reset_activities):
+    """Test that duplicates are caught across batch boundaries"""
+    content = (
+        "activity,email\n"
+        "Gym Class,a@mergington.edu\n"
+        "Gym Class,b@mergington.edu\n"
+        "Gym Class,a@mergington.edu\n"
+    )
+
+    rows = csv.DictReader(content.splitlines())
+    data = import_enrollment_rows(rows, batch_size=2)
+    assert data["imported"] == 2
+    assert data["failed"] == 1
+    assert data["errors"][0]["row"] == 4
+
+
+def test_import_missing_columns(client, reset_activities):
+    """Test that a CSV without the expected header is rejected"""
+    response = upload(client, "name,address\nfoo,bar\n")
+    assert response.status_code == 400
+    assert "activity" in response.json()["detail"]
+
+
+def test_import_invalid_utf8_row(client, reset_activities):
+    """Test that a bad byte mid-file only fails its own row"""
+    rows = [f"Gym Class,ok{i}@mergington.edu".encode() for i in range(5)]
+    rows.append(b"Gym Class,bad\xff@mergington.edu")
+    rows.append(b"Gym Class,after@mergington.edu")
+    content = b"activity,email\n" + b"\n".join(rows) + b"\n"
+
+    response = upload(client, content)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["processed"] == 7
+    assert data["imported"] == 6
+    assert data["failed"] == 1
+    assert data["errors"][0]["row"] == 7
+    assert "UTF-8" in data["errors"][0]["error"]
+
+
+def test_import_unicode_line_separators(client, reset_activities):
+    """Test that only real newlines split CSV rows"""
+    response = upload(client, "activity,email\nChess Club,a\x85@mergington.edu\n")
+    data = response.json()
+    assert data["processed"] == 1
+    assert data["imported"] == 1
+
+    response = client.get("/activities")
+    assert "a\x85@mergington.edu" in response.json()["Chess Club"]["participants"]
+
+
+def test_import_unparseable_row(client, reset_activities):
+    """Test that a row the CSV parser rejects is reported and skipped"""
+    content = (
+        "activity,email\n"
+        "Gym Class,ok@mergington.edu\n"
+        f'Gym Class,"{"x" * 200000}"\n'
+        "Gym Class,after@mergington.edu\n"
+    )
+
+    response = upload(client, content)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["processed"] == 3
+    assert data["imported"] == 2
+    assert data["failed"] == 1
+    assert data["processed"] == data["imported"] + data["failed"]
+    assert data["errors"][0]["row"] == 3
+    assert "Unreadable CSV row" in data["errors"][0]["error"]
+
+    response = client.get("/activities")
+    assert "after@mergington.edu" in response.json()["Gym Class"]["participants"]
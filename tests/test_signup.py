@@ -100,4 +100,15 @@ def test_signup_empty_email(client, reset_activities):
     # Verify empty string was added (though not realistic)
     response = client.get("/activities")
     data = response.json()
-    assert "" in data[activity]["participants"]
\ No newline at end of file
+    assert "" in data[activity]["participants"]
+
+def test_signup_full_activity(client, reset_activities):
+    """Test that signup is rejected once an activity is full"""
+    activity = "Mathletes"
+    for i in range(8):
+        response = client.post(f"/activities/{activity}/signup?email=s{i}@mergington.edu")
+        assert response.status_code == 200
+
+    response = client.post(f"/activities/{activity}/signup?email=late@mergington.edu")
+    assert response.status_code == 400
+    assert "full" in response.json()["detail"]
\ No newline at end of file